@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""web.py 各变体共用的数据层：模型加载、特征映射、输入表单与缓存的预测逻辑。"""
+
+import math
+import os
+import numpy as np
+import joblib
+import lightgbm as lgb
+import streamlit as st
+
+_MODEL_PKL = "result/LGBM-dart_model.pkl"
+_MODEL_TXT = "result/LGBM-dart_model.txt"
+_FEATURES_PKL = "result/LGBM-dart_features.pkl"
+
+# ───────────────────────── Model & Features ───────────────────
+@st.cache_resource
+def load_bundle():
+    # 一个缓存项装下模型 + 特征列表，冷启动只查一次缓存
+    feature_list = joblib.load(_FEATURES_PKL)
+    if os.path.exists(_MODEL_TXT):
+        # 原生文本格式：C++ 直接解析，比 unpickle 整个 sklearn 包装快得多
+        booster = lgb.Booster(model_file=_MODEL_TXT)
+    else:
+        # 首次启动一次性迁移：pkl → model.txt，之后都走原生加载
+        booster = joblib.load(_MODEL_PKL, mmap_mode="r").booster_
+        booster.save_model(_MODEL_TXT)
+    # raw score + sigmoid 的路径假定二分类单输出模型，加载时校验一次
+    if booster.num_model_per_iteration() != 1:
+        raise ValueError(
+            f"Expected a binary (single-output) LightGBM model, "
+            f"got {booster.num_model_per_iteration()} outputs per iteration."
+        )
+    return booster, feature_list
+
+booster, feature_list = load_bundle()
+
+# ───────────────────────── Name Mapping (fixed) ───────────────
+COLUMN_MAPPING = {
+    "SB": "SBP", "DB": "DBP", "T": "Temp",
+    "score1": "APS III", "score2": "WBC", "score6": "PLT",
+    "score7": "AG", "score8": "HCO₃⁻", "SC1": "RDW",
+    "Na": "Na⁺", "BUN": "BUN", "Cre": "Creatinine", "Lac": "Lac"
+}
+std_feature_list = [COLUMN_MAPPING.get(f, f) for f in feature_list]
+
+# ───────────────────────── Defaults & Labels ──────────────────
+DEFAULTS = {
+    "SBP": 122.5, "DBP": 84.8, "APS III": 29, "WBC": 7.9,
+    "PLT": 165.4, "AG": 9, "HCO₃⁻": 21, "RDW": 15.3,
+    "Na⁺": 137.3, "BUN": 14.7, "Temp": 37, "Lac": 0.9, "Creatinine": 0.9
+}
+LABELS = {
+    "SBP": "Systolic Blood Pressure (SBP) – mmHg",
+    "DBP": "Diastolic Blood Pressure (DBP) – mmHg",
+    "APS III": "Acute Physiology Score III (APSIII)",
+    "WBC": "White Blood Cell Count (WBC) – 10³/µL",
+    "AG": "Anion Gap (AG) – mmol/L",
+    "HCO₃⁻": "Bicarbonate (HCO₃⁻) – mmol/L",
+    "Na⁺": "Sodium (Na⁺) – mmol/L",
+    "BUN": "Blood Urea Nitrogen (BUN) – mg/dL",
+    "Temp": "Body Temperature (Temp) – °C",
+    "RDW": "Red Cell Distribution Width (RDW) – fl",
+    "PLT": "Platelet Count (PLT) – 10³/µL",
+    "Lac": "Lactate (Lac) – mmol/L",
+    "Creatinine": "Creatinine (Cre) – mg/dL"
+}
+
+# ───────────────────────── Input Form ─────────────────────────
+# 预分配的单行输入缓冲：每次 rerun 原地覆写，不再重新分配
+_ROW_BUF = np.empty((1, len(std_feature_list)), dtype=np.float64)
+
+# 每个字段的 (标签, 默认值) 预先解析好，表单循环里不再做字典查找
+_FIELDS = tuple(
+    (LABELS.get(feat, feat), float(DEFAULTS.get(feat, 0.0)))
+    for feat in std_feature_list
+)
+
+def user_input_features():
+    st.markdown("### 👨‍⚕️ Enter the 12 clinical indicators")
+    # st.form：13 个输入框的编辑不再各自触发 rerun，提交时只跑一次
+    with st.form("clinical"):
+        left, right = st.columns(2)
+        vals = []
+        for i, (label, default) in enumerate(_FIELDS):
+            col = left if i < 6 else right
+            # number_input 在前端就完成数值校验，直接拿到 float
+            vals.append(col.number_input(
+                label=label,
+                value=default,
+                format="%g",
+                step=None,
+                help="No min/max limits."
+            ))
+        submitted = st.form_submit_button("Start Prediction")
+    # 一次性写入缓冲，替代 13 次逐元素赋值
+    _ROW_BUF[0, :] = np.fromiter(vals, dtype=np.float64, count=len(vals))
+    return _ROW_BUF, submitted
+
+# ───────────────────────── Cached Prediction ──────────────────
+@st.cache_data(max_entries=128)
+def predict_and_explain(x_tuple: tuple):
+    """同样的 13 个输入只算一次：预测 + TreeSHAP 都缓存。"""
+    # 1×N ndarray：跳过 pandas 构造与列名校验，直接走树推理
+    X = np.ascontiguousarray([x_tuple], dtype=np.float64)
+
+    # ——— 单次 C++ 调用拿到全部结果：pred_contrib 的贡献和 + base 即 raw score
+    # 单行推理用单线程：省掉 OpenMP 每次调用的线程分发开销
+    contribs = booster.predict(X, pred_contrib=True, num_threads=1)
+    sv_vec = np.asarray(contribs[0, :-1], dtype=float)
+    base_val = float(contribs[0, -1])
+    raw = float(contribs[0].sum())
+    # 本地 sigmoid：跳过 sklearn 包装层的两列概率归一化
+    proba = 1.0 / (1.0 + math.exp(-raw))
+    return proba, sv_vec, base_val
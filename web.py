@@ -1,194 +1,116 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-
-import os
-import re
-import numpy as np
-import pandas as pd
-import shap
-import joblib
-import matplotlib.pyplot as plt
-import tempfile
-import streamlit as st
-
-# ───────────────────────── App Config ─────────────────────────
-st.set_page_config(
-    page_title="Medical AI Prediction System",
-    page_icon="🏥",
-)
-
-# ───────────────────────── Global Styles ──────────────────────
-st.markdown("""
-<style>
-/* 整个页面内容居中显示，最大宽度 800px */
-.main .block-container {
-    max-width: 800px;      /* 控制整体宽度 */
-    margin-left: auto;     /* 居中 */
-    margin-right: auto;    /* 居中 */
-}
-
-/* 全局字体缩放 */
-html, body, [class*="css"] {
-    font-size: 0.9rem; /* 你可以改成 0.8rem 或 1rem */
-}
-</style>
-""", unsafe_allow_html=True)
-
-# ───────────────────────── Model & Features ───────────────────
-@st.cache_resource
-def load_model():
-    return joblib.load("result/LGBM-dart_model.pkl")
-
-@st.cache_resource
-def load_features():
-    return joblib.load("result/LGBM-dart_features.pkl")
-
-model = load_model()
-feature_list = load_features()
-explainer = shap.TreeExplainer(model)
-
-# ───────────────────────── Name Mapping (fixed) ───────────────
-COLUMN_MAPPING = {
-    "SB": "SBP", "DB": "DBP", "T": "Temp",
-    "score1": "APS III", "score2": "WBC", "score6": "PLT",
-    "score7": "AG", "score8": "HCO₃⁻", "SC1": "RDW",
-    "Na": "Na⁺", "BUN": "BUN", "Cre": "Creatinine", "Lac": "Lac"
-}
-std_feature_list = [COLUMN_MAPPING.get(f, f) for f in feature_list]
-
-# ───────────────────────── Defaults & Labels ──────────────────
-DEFAULTS = {
-    "SBP": 122.5, "DBP": 84.8, "APS III": 29, "WBC": 7.9,
-    "PLT": 165.4, "AG": 9, "HCO₃⁻": 21, "RDW": 15.3,
-    "Na⁺": 137.3, "BUN": 14.7, "Temp": 37, "Lac": 0.9, "Creatinine": 0.9
-}
-LABELS = {
-    "SBP": "Systolic Blood Pressure (SBP) – mmHg",
-    "DBP": "Diastolic Blood Pressure (DBP) – mmHg",
-    "APS III": "Acute Physiology Score III (APSIII)",
-    "WBC": "White Blood Cell Count (WBC) – 10³/µL",
-    "AG": "Anion Gap (AG) – mmol/L",
-    "HCO₃⁻": "Bicarbonate (HCO₃⁻) – mmol/L",
-    "Na⁺": "Sodium (Na⁺) – mmol/L",
-    "BUN": "Blood Urea Nitrogen (BUN) – mg/dL",
-    "Temp": "Body Temperature (Temp) – °C",
-    "RDW": "Red Cell Distribution Width (RDW) – fl",
-    "PLT": "Platelet Count (PLT) – 10³/µL",
-    "Lac": "Lactate (Lac) – mmol/L",
-    "Creatinine": "Creatinine (Cre) – mg/dL"
-}
-
-# ───────────────────────── UI Header ──────────────────────────
-st.title("🏥 Medical AI Decision Support System")
-st.markdown(
-    "Enter the 12 bedside test indicators below. The system will predict **in-hospital mortality risk** "
-    "and provide a **SHAP force plot (static)** explanation.\n"
-)
-
-# ───────────────────────── Helpers ────────────────────────────
-_num_pattern = re.compile(r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
-
-def _to_float(text: str, default: float, name: str) -> float:
-    t = text.strip()
-    if _num_pattern.match(t):
-        try:
-            return float(t)
-        except Exception:
-            st.warning(f"⚠️ {name}: cannot parse '{t}', fallback to default {default}.")
-            return float(default)
-    else:
-        st.warning(f"⚠️ {name}: invalid number '{t}', fallback to default {default}.")
-        return float(default)
-
-def user_input_features() -> pd.DataFrame:
-    st.markdown("### 👨‍⚕️ Enter the 12 clinical indicators")
-    left, right = st.columns(2)
-    data = {}
-    for i, feat in enumerate(std_feature_list):
-        col = left if i < 6 else right
-        val_str = col.text_input(
-            label=LABELS.get(feat, feat),
-            value=str(DEFAULTS.get(feat, 0)),
-            placeholder="Enter any real number (no limits)",
-            help="No min/max or decimal-place limits. Scientific notation supported (e.g., 1e-3)."
-        )
-        data[feat] = _to_float(val_str, DEFAULTS.get(feet, 0) if (feet:=feat) else 0, feat)
-    df = pd.DataFrame([data], columns=std_feature_list).astype(float)
-    return df
-
-# ───────────────────────── Main Form ──────────────────────────
-input_df = user_input_features()
-
-if st.button("Start Prediction"):
-    # ——— Predict
-    X = input_df[std_feature_list]
-    proba = model.predict_proba(X)[0, 1] * 100.0
-    proba_int = round(proba, 2)
-
-    st.markdown(
-        f"""
-        <div style='text-align:center; font-size:28px; color:#c62828; margin:20px 0; font-weight:800;'>
-            🤖 Predicted in-hospital mortality probability: <span style='font-size:40px;'>{proba_int}%</span>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-    st.markdown("---")
-    st.subheader("🔍 SHAP Force Plot (Static, Matplotlib)")
-
-    # ——— SHAP values & base value（版本安全）
-    shap_values = explainer.shap_values(X)
-    if isinstance(shap_values, list):  # 二分类：取正类
-        sv_vec = np.array(shap_values[-1][0], dtype=float)
-        base_val = float(np.ravel(explainer.expected_value)[-1])
-    else:
-        sv_vec = np.array(shap_values[0], dtype=float)
-        base_val = float(np.ravel(explainer.expected_value)[0])
-
-    feature_values = X.iloc[0].values.astype(float)
-    short_names    = std_feature_list
-
-    # ——— 静态 force_plot（半屏显示）
-    import matplotlib as mpl
-    mpl.rcParams.update({
-        'font.size': 10,
-        'axes.titlesize': 10,
-        'axes.labelsize': 10,
-        'xtick.labelsize': 9,
-        'ytick.labelsize': 9,
-        'legend.fontsize': 9
-    })
-
-    plt.figure(figsize=(3, 2))
-    shap.force_plot(
-        base_val,
-        sv_vec,
-        feature_values,
-        feature_names=short_names,
-        matplotlib=True,
-        show=False
-    )
-
-    # 半屏宽度容器
-    st.markdown(
-        """
-        <div style='max-width:500px; margin:auto;'>
-        """,
-        unsafe_allow_html=True
-    )
-    st.pyplot(plt.gcf(), use_container_width=False)
-    st.markdown("</div>", unsafe_allow_html=True)
-
-    plt.close()
-
-
-
-
-
-
-
-
-
-
-
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import numpy as np
+import streamlit as st
+
+# ───────────────────────── App Config ─────────────────────────
+st.set_page_config(
+    page_title="Medical AI Prediction System",
+    page_icon="🏥",
+)
+
+from medical_app_common import (
+    predict_and_explain,
+    std_feature_list,
+    user_input_features,
+)
+
+# ───────────────────────── Global Styles ──────────────────────
+st.markdown("""
+<style>
+/* 整个页面内容居中显示，最大宽度 800px */
+.main .block-container {
+    max-width: 800px;      /* 控制整体宽度 */
+    margin-left: auto;     /* 居中 */
+    margin-right: auto;    /* 居中 */
+}
+
+/* 全局字体缩放 */
+html, body, [class*="css"] {
+    font-size: 0.9rem; /* 你可以改成 0.8rem 或 1rem */
+}
+</style>
+""", unsafe_allow_html=True)
+
+# ───────────────────────── UI Header ──────────────────────────
+st.title("🏥 Medical AI Decision Support System")
+st.markdown(
+    "Enter the 12 bedside test indicators below. The system will predict **in-hospital mortality risk** "
+    "and provide a **SHAP force plot (static)** explanation.\n"
+)
+
+# ───────────────────────── Cached Rendering ───────────────────
+@st.cache_data(max_entries=128)
+def render_force_png(x_tuple: tuple) -> bytes:
+    """同一组输入只渲染一次 force plot，重复提交直接复用缓存的 PNG 字节。"""
+    _, sv_vec, base_val = predict_and_explain(x_tuple)
+
+    # 延迟到首次出图才 import（字体缓存/后端初始化 ~数百 ms），首屏更快
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    mpl.rcParams.update({
+        'font.size': 10,
+        'axes.titlesize': 10,
+        'axes.labelsize': 10,
+        'xtick.labelsize': 9,
+        'ytick.labelsize': 9,
+        'legend.fontsize': 9
+    })
+
+    # 每个会话只建一次 Figure，复用时 clf() 清空即可
+    if "force_fig" not in st.session_state:
+        st.session_state.force_fig = plt.figure(figsize=(4, 3))
+    fig = st.session_state.force_fig
+    fig.clf()
+
+    # 手绘贡献条形图：约 20 个 artist，替代 force_plot 的数百个
+    ax = fig.add_subplot(111)
+    order = np.argsort(np.abs(sv_vec))[::-1]
+    vals = sv_vec[order]
+    ax.barh(
+        [std_feature_list[i] for i in order],
+        vals,
+        color=['#c62828' if v > 0 else '#1565c0' for v in vals]
+    )
+    ax.axvline(0, color='k', lw=0.5)
+    ax.invert_yaxis()  # 最大贡献排最上面
+    ax.set_title(f"SHAP contributions (base={base_val:.3f})")
+
+    # 固定边距，跳过 bbox_inches='tight' 的整图重绘测量
+    fig.subplots_adjust(left=0.28, right=0.96, top=0.9, bottom=0.12)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=200)
+    return buf.getvalue()
+
+# ───────────────────────── Main Form ──────────────────────────
+input_row, submitted = user_input_features()
+
+if submitted:
+    # ——— Predict（缓存命中时跳过 predict + TreeSHAP）
+    x_tuple = tuple(input_row[0].tolist())
+    proba, sv_vec, base_val = predict_and_explain(x_tuple)
+    proba_int = round(proba * 100.0, 2)
+
+    st.markdown(
+        f"""
+        <div style='text-align:center; font-size:28px; color:#c62828; margin:20px 0; font-weight:800;'>
+            🤖 Predicted in-hospital mortality probability: <span style='font-size:40px;'>{proba_int}%</span>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    st.markdown("---")
+    st.subheader("🔍 SHAP Contributions (Static, Matplotlib)")
+
+    # 半屏宽度容器
+    st.markdown(
+        """
+        <div style='max-width:500px; margin:auto;'>
+        """,
+        unsafe_allow_html=True
+    )
+    st.image(render_force_png(x_tuple))
+    st.markdown("</div>", unsafe_allow_html=True)